@@ -10,30 +10,148 @@
 #
 # How many circular primes are there below one million?
 
-import sys
+import argparse
+
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from itertools import (
+    chain,
+    islice,
+)
 
 from utils import (
+    chunk_ranges,
+    digits,
+    int_from_digits,
     is_prime,
+    num_digits,
     rotations,
 )
 
+# Flags for the integers below 1000 with only the digits 1, 3, 7 and 9, when
+# written with exactly three digits, and when written without leading zeros.
+_ODD_DIGIT_BLOCKS = bytes(all(d in (1, 3, 7, 9) for d in (b // 100, b // 10 % 10, b % 10)) for b in range(1000))
+_ODD_DIGIT_LEADING_BLOCKS = bytes(b > 0 and all(d in (1, 3, 7, 9) for d in digits(b)) for b in range(1000))
+
+def is_candidate_circular_prime(n):
+    """
+    Every rotation of a circular prime with two or more digits ends in each
+    of its digits, so those digits can only be 1, 3, 7 or 9. This rejects
+    any other n with an even digit or a 5 before any primality test, three
+    digits at a time.
+    """
+    if n < 10:
+        return n in (2, 3, 5, 7)
+    while n >= 1000:
+        n, b = divmod(n, 1000)
+        if not _ODD_DIGIT_BLOCKS[b]:
+            return False
+    return _ODD_DIGIT_LEADING_BLOCKS[n] == 1
+
 def is_circular_prime(n):
+    if not is_candidate_circular_prime(n):
+        return False
     if any(not is_prime(rot) for rot in rotations(n)):
         return False
     return True
 
-def circular_primes(ubound):
-    for n in range(1, ubound):
-        if is_circular_prime(n):
-            yield n
+def circular_prime_candidates(int_range):
+    """
+    Generates in ascending order the integers in a range which pass
+    is_candidate_circular_prime, by building them from the digits 1, 3, 7
+    and 9, one more digit at a time, rather than by filtering every integer
+    in the range.
+    """
+    lo, hi = int_range.start, int_range.stop
+    yield from (n for n in (2, 3, 5, 7) if lo <= n < hi)
+    ns = [1, 3, 7, 9]
+    while 10*ns[0] < hi:
+        ns = [10*m + k for m in ns for k in (1, 3, 7, 9)]
+        yield from ns[bisect_left(ns, lo):bisect_left(ns, hi)]
 
-if __name__ =='__main__':
-    ubound = int(sys.argv[1].strip())
-    count = sum(1 for n in circular_primes(ubound))
-    print('\nNo. of circular primes < {}: {}\n'.format(ubound, count))
+def circular_primes_in_range(int_range):
+    return [n for n in circular_prime_candidates(int_range) if is_circular_prime(n)]
+
+def circular_primes(ubound, workers=1):
+    """
+    Generates the circular primes below ubound in ascending order. If more
+    than one worker is requested the range is split into chunks which are
+    searched in a pool of worker processes, and the results are collected in
+    the order of the chunks.
+    """
+    if workers <= 1:
+        yield from circular_primes_in_range(range(2, ubound))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = chunk_ranges(2, ubound, workers, min_chunk_size=10**5)
+        yield from chain.from_iterable(pool.map(circular_primes_in_range, chunks))
 
+def lyndon_words(n, alphabet):
+    """
+    Generates the Lyndon words of length at most n over an ordered alphabet
+    in lexicographic order, using Duval's algorithm. A Lyndon word is
+    strictly smaller than all of its proper rotations, and every necklace
+    (class of words under rotation) of length n is a unique repetition of a
+    Lyndon word whose length divides n, e.g. for n = 2 and alphabet (1, 3)
 
+        (1,), (1, 3), (3,)
+    """
+    k = len(alphabet)
+    w = [-1]
+    while w:
+        w[-1] += 1
+        yield tuple(alphabet[i] for i in w)
+        m = len(w)
+        while len(w) < n:
+            w.append(w[-m])
+        while w and w[-1] == k - 1:
+            w.pop()
 
+def circular_prime_classes(ubound):
+    """
+    Generates the rotation classes of the circular primes below ubound as
+    tuples of their distinct rotations below ubound, starting with the
+    smallest (canonical) rotation, e.g. for ubound = 100
 
+        (2,), (3,), (5,), (7,), (11,), (13, 31), (17, 71), (37, 73), (79, 97)
 
+    Instead of testing every n below ubound, only the canonical member of
+    each class of d-digit integers with the digits 1, 3, 7 and 9 is
+    constructed, as a repetition of a Lyndon word of length m dividing d,
+    and its m distinct rotations are tested once for the whole class. The
+    classes with a digit sum divisible by 3 are skipped without a test.
+    """
+    for p in (2, 3, 5, 7):
+        if p < ubound:
+            yield (p,)
+    for d in range(2, num_digits(ubound - 1) + 1):
+        for w in lyndon_words(d, (1, 3, 7, 9)):
+            m = len(w)
+            if d % m or (sum(w)*(d // m)) % 3 == 0:
+                continue
+            n = int_from_digits(w*(d // m))
+            if n >= ubound:
+                continue
+            cycle = sorted(islice(rotations(n), m))
+            if all(is_prime(r) for r in cycle):
+                yield tuple(r for r in cycle if r < ubound)
 
+def count_circular_primes(ubound):
+    """
+    Counts the circular primes below ubound by enumerating their rotation
+    classes, which takes roughly 4^d / d class tests for d-digit bounds
+    instead of one test per integer.
+    """
+    return sum(len(c) for c in circular_prime_classes(ubound))
+
+if __name__ =='__main__':
+    parser = argparse.ArgumentParser(description='Counts the circular primes below a bound.')
+    parser.add_argument('ubound', type=int)
+    parser.add_argument('--workers', type=int, default=1, help='no. of worker processes')
+    parser.add_argument('--canonical', action='store_true', help='enumerate the rotation classes instead of every candidate')
+    args = parser.parse_args()
+    if args.canonical:
+        count = count_circular_primes(args.ubound)
+    else:
+        count = sum(1 for n in circular_primes(args.ubound, workers=args.workers))
+    print('\nNo. of circular primes < {}: {}\n'.format(args.ubound, count))
@@ -3,32 +3,207 @@
 # https://projecteuler.net/problem=20
 #
 # The factorial function f(n) is defined for non-negative integers:
-# it is the product of the first n consecutive integers 1, 2, ... , n 
+# it is the product of the first n consecutive integers 1, 2, ... , n
 # when n is positive, and 1 when n is 0. e.g. 4! = 4 x 3 x 2 x 1 = 24
 # and 0! = 1 by definition.
 #
 # The factorial digit sum of n is the sum of the digits of n!.
 
+import decimal
+import os
 import sys
 
 from math import factorial
 
 from utils import digits
 
+# A decimal context with unlimited precision, so that integer arithmetic with
+# Decimals is exact. Multiplication of large Decimals is subquadratic (it uses
+# number theoretic transforms) and their conversion to strings is linear,
+# unlike conversion of large Python ints to strings or powers of ten.
+_exact = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+
+# The digit sums of all the k-digit chunks, for k = 4.
+_CHUNK_DIGITS = 4
+_CHUNK = 10**_CHUNK_DIGITS
+_CHUNK_DIGIT_SUMS = [sum(digits(c)) for c in range(_CHUNK)]
+
+# Integers with more bits than this are converted to Decimals to sum their
+# digits, because splitting them into chunks with CPython int division is
+# quadratic - the conversion is faster from a few hundred bits upwards.
+_DECIMAL_BITS = 2**9
+
+# Cached powers 2^(2^j) as Decimals used to convert ints to Decimals.
+_decimal_powers_of_two = {}
+
+
+def _decimal_power_of_two(k):
+    if k not in _decimal_powers_of_two:
+        if k <= 64:
+            _decimal_powers_of_two[k] = _exact.create_decimal(2**k)
+        else:
+            half = _decimal_power_of_two(k // 2)
+            _decimal_powers_of_two[k] = _exact.multiply(half, half)
+    return _decimal_powers_of_two[k]
+
+
+def int_to_decimal(n):
+    """
+        Converts a non-negative int n to an exact Decimal by splitting its
+        bits in two at a power of two 2^k, and converting the two halves
+        recursively, i.e.
+
+            n = hi x 2^k + lo -> Decimal(hi) x Decimal(2^k) + Decimal(lo)
+
+        which is subquadratic, unlike Decimal(n) for large n.
+    """
+    if n.bit_length() <= 2**12:
+        return _exact.create_decimal(n)
+    k = 1 << ((n.bit_length() - 1).bit_length() - 1)
+    hi, lo = n >> k, n & ((1 << k) - 1)
+    return _exact.add(_exact.multiply(int_to_decimal(hi), _decimal_power_of_two(k)), int_to_decimal(lo))
+
+
+def decimal_digit_sum(d):
+    """
+        Returns the digit sum of a non-negative integral Decimal d.
+    """
+    s = format(d, 'f')
+    return sum(i*s.count(str(i)) for i in range(1, 10))
+
+
 def digit_sum(n):
+    """
+        Returns the sum of the decimal digits of an integer n. Small n are
+        split into k-digit chunks (k = 4) whose digit sums are looked up in
+        a table, and large n are converted to Decimals in subquadratic time
+        and their digits counted instead.
+    """
     if n < 0:
         return digit_sum(-n)
-    elif n in range(0, 10):
-        return n
-    return sum(d for d in digits(n))
+    elif n.bit_length() > _DECIMAL_BITS:
+        return decimal_digit_sum(int_to_decimal(n))
+    s = 0
+    while n >= _CHUNK:
+        n, c = divmod(n, _CHUNK)
+        s += _CHUNK_DIGIT_SUMS[c]
+    return s + _CHUNK_DIGIT_SUMS[n]
+
+
+def decimal_factorial(n, lo=1):
+    """
+        Returns the product lo x (lo + 1) x ... x n as an exact Decimal, which
+        is n! by default. The product is computed as a balanced product tree
+        so that the multiplications of large operands are subquadratic.
+    """
+    if n - lo < 16:
+        p = 1
+        for k in range(lo, n + 1):
+            p *= k
+        return _exact.create_decimal(p)
+    m = (lo + n) // 2
+    return _exact.multiply(decimal_factorial(m, lo), decimal_factorial(n, m + 1))
+
 
 def factorial_digit_sum(n):
-    return digit_sum(factorial(n))
+    if n < 0:
+        raise ValueError('factorial_digit_sum() not defined for negative values')
+    return decimal_digit_sum(decimal_factorial(n))
+
+
+def factorial_trailing_zeros(n):
+    """
+        Returns the number of trailing zeros of n!, which is the exponent of
+        5 in n!, i.e. n // 5 + n // 25 + n // 125 + ...
+    """
+    z = 0
+    while n:
+        n //= 5
+        z += n
+    return z
+
+
+def read_digit_sum_cache(cache_path):
+    """
+        Reads a digit sum cache file, with lines of the form 'n digit_sum',
+        into a dict, or returns an empty dict if the file does not exist.
+        Malformed lines, e.g. a partial last line left by an interrupted
+        run, are skipped.
+    """
+    if not os.path.exists(cache_path):
+        return {}
+    cache = {}
+    with open(cache_path) as f:
+        for line in f:
+            fields = line.split()
+            if line.endswith('\n') and len(fields) == 2 and all(x.isdigit() for x in fields):
+                cache[int(fields[0])] = int(fields[1])
+    return cache
+
+
+def factorial_digit_sums(int_range, strip_zeros=False, cache_path=None):
+    """
+        Generates the pairs (n, factorial_digit_sum(n)) for the n in a range
+        of non-negative integers in increasing order, building each factorial
+        from the previous one instead of from scratch, e.g.
+
+            range(4, 7) -> (4, 6), (5, 3), (6, 9)
+
+        If 'strip_zeros' is True the running product is kept as n! / 10^z,
+        where z is the number of trailing zeros of n!, by dividing every new
+        factor by its powers of 5 and the product by the same powers of 2,
+        which keeps the product smaller and has the same digit sum.
+
+        If a 'cache_path' is given the digit sums are read from the file
+        where possible, and the new ones are appended to it, so that a later
+        run resumes where the last one stopped. The factorial is only built
+        for the n which are not in the cache, starting from math.factorial
+        after a gap.
+    """
+    if int_range and min(int_range[0], int_range[-1]) < 0:
+        raise ValueError('factorial_digit_sums() not defined for negative values')
+    cache = read_digit_sum_cache(cache_path) if cache_path else {}
+    cache_file = open(cache_path, 'a') if cache_path else None
+    if cache_file and cache_file.tell() > 0:
+        # Start a new line after a partial last line
+        with open(cache_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read() != b'\n':
+                cache_file.write('\n')
+    p, m = None, None
+    try:
+        for n in int_range:
+            if n in cache:
+                yield n, cache[n]
+                continue
+            if m is None or m != n - 1:
+                m = max(n - 1, 0)
+                p = factorial(m)
+                if strip_zeros:
+                    p //= 10**factorial_trailing_zeros(m)
+            for k in range(m + 1, n + 1):
+                if strip_zeros:
+                    a = 0
+                    while k % 5 == 0:
+                        k //= 5
+                        a += 1
+                    p = (p*k) >> a
+                else:
+                    p *= k
+            m = n
+            s = digit_sum(p)
+            if cache_file:
+                cache_file.write('{} {}\n'.format(n, s))
+                cache_file.flush()
+            yield n, s
+    finally:
+        if cache_file:
+            cache_file.close()
+
 
 if __name__ == '__main__':
     n = int(sys.argv[1].strip())
-    fact = factorial(n)
-    digs = digits(fact)
-    digit_sum_str = ' + '.join(str(d) for d in digs)
-    fact_digit_sum = digit_sum(n)
+    fact = format(decimal_factorial(n), 'f')
+    digit_sum_str = ' + '.join(fact)
+    fact_digit_sum = factorial_digit_sum(n)
     print('\n{}! = {}, digit sum = {} = {}\n'.format(n, fact, digit_sum_str, fact_digit_sum))
@@ -4,12 +4,11 @@
 
 import math
 
+from collections import Counter
+
 from utils import (
-    complexify,
-    complex_divide,
-    complex_format,
-    complex_reflections,
-    integerise,
+    GaussianInt,
+    prime_factors,
 )
 
 
@@ -18,28 +17,106 @@ def is_gaussian_integer(z):
         Checks whether a given real or complex number is a Gaussian integer,
         i.e. a complex number g = a + bi such that a and b are integers.
     """
-    if type(z) == int:
+    if isinstance(z, (int, GaussianInt)):
         return True
     return z.real.is_integer() and z.imag.is_integer()
 
 
+def two_squares(p):
+    """
+        Returns the pair (a, b) with a > b > 0 and a^2 + b^2 = p for a prime
+        p = 1 (mod 4), by Cornacchia's algorithm: a square root x of -1 mod
+        p is found from a quadratic non-residue c as c^((p - 1) / 4), and the
+        Euclidean algorithm is run on p and x until the remainder is below
+        sqrt(p), which is then one of the two squares, e.g.
+
+            5 -> (2, 1), 13 -> (3, 2), 29 -> (5, 2)
+    """
+    c = 2
+    while pow(c, (p - 1) // 2, p) != p - 1:
+        c += 1
+    x = pow(c, (p - 1) // 4, p)
+    a, b = p, x
+    limit = math.isqrt(p)
+    while b > limit:
+        a, b = b, a % b
+    return max(b, math.isqrt(p - b*b)), min(b, math.isqrt(p - b*b))
+
+
+def gaussian_factor(g):
+    """
+        Returns the factorisation of a non-zero Gaussian integer g as a pair
+        (u, factors) of a unit u and an ordered list of pairs (q, e) of
+        Gaussian primes q, normalised to a + bi with a > 0 and b >= 0, and
+        their multiplicities e, such that g = u x q_1^e_1 x q_2^e_2 x ...,
+        e.g.
+
+            5 -> (-i, [(1+2i, 1), (2+i, 1)])
+            3+i -> (-i, [(1+i, 1), (1+2i, 1)])
+
+        It is built from the factorisation of the norm N(g) with
+        utils.prime_factors, where a rational prime p
+
+            * 2 is -i(1 + i)^2, so (1 + i) has the multiplicity of 2
+            * p = 3 (mod 4) is a Gaussian prime of norm p^2, so it has half
+              the multiplicity of p
+            * p = 1 (mod 4) is (a + bi)(a - bi) for p = a^2 + b^2 from
+              two_squares, and the multiplicity of p is shared between the
+              two conjugate primes by dividing g by one of them
+
+        The rational content gcd(a, b) of g = a + bi is factorised apart from
+        the rest, whose norm is smaller.
+    """
+    g = GaussianInt.from_number(g)
+    if not g:
+        raise ValueError('0 has no factorisation')
+    c = math.gcd(g.real, g.imag)
+    exponents = Counter()
+    for p, e in prime_factors(c, multiplicities=True):
+        exponents[p] += 2*e
+    for p, e in prime_factors((g // c).norm(), multiplicities=True):
+        exponents[p] += e
+
+    factors = []
+    z = g
+    for p, e in sorted(exponents.items()):
+        if p == 2:
+            primes = [(GaussianInt(1, 1), e)]
+        elif p % 4 == 3:
+            primes = [(GaussianInt(p, 0), e // 2)]
+        else:
+            a, b = two_squares(p)
+            q, w, k = GaussianInt(a, b), z, 0
+            while k < e and w.is_divisible_by(q):
+                w //= q
+                k += 1
+            # b + ai = i(a - bi) is the normalised conjugate of q
+            primes = [(q, k), (GaussianInt(b, a), e - k)]
+        for q, k in primes:
+            if k:
+                z //= q**k
+                factors.append((q, k))
+    return z, sorted(factors, key=lambda f: (f[0].norm(), f[0].real))
+
+
 def gaussian_divisors(g):
     """
         Generates a sequence of Gaussian divisors of a rational or Gaussian
         integer g, i.e. a Gaussian integer d such that g / d is also a Gaussian
-        integer.
+        integer, as GaussianInts. The divisors are built from the
+        factorisation of g by gaussian_factor, as all the products of powers
+        q^k of its primes with 0 <= k <= e, each with its four associates,
+        so the cost is proportional to the number of divisors.
     """
-    if not is_gaussian_integer(g):
+    if not is_gaussian_integer(g) or not g:
         return
-    g = complex_format(g)
-    ubound = math.ceil(math.sqrt(abs(g))) if g.real and g.imag else int(g.real) if g.real else int(g.imag)
-    for a in range(ubound + 1):
-        for b in range(ubound + 1):
-            if a or b:
-                d = complex(a, b)
-                if is_gaussian_integer(complex_divide(g, d)):
-                    for f in complex_reflections(d):
-                        yield f
+    _, factors = gaussian_factor(g)
+    divisors = [GaussianInt(1, 0)]
+    for q, e in factors:
+        powers = [q**k for k in range(e + 1)]
+        divisors = [d*r for d in divisors for r in powers]
+    for d in divisors:
+        yield from d.associates()
 
 
 def s(g):
@@ -50,11 +127,90 @@ def s(g):
     return sum(int(g.real) for g in gaussian_divisors(g) if g.real > 0)
 
 
-def sum_s(n):
+def sum_s_brute_force(n):
     """
         Returns the sum of the sums of Gaussian divisors of integers 1..n, e.g.
 
             sum_s(5) = s(1) + s(2) + s(3) + s(4) + s(5)
 
+        by computing every s(k) from its Gaussian divisors. This is a
+        reference for sum_s, which is much faster.
     """
     return sum(s(k) for k in range(1, n + 1))
+
+
+def divisor_sum_summatory(n):
+    """
+        Returns the sum of the divisor sums sigma(1) + ... + sigma(n), which
+        is also the sum of k x floor(n / k) for k = 1..n, by summing k over
+        the O(sqrt(n)) blocks of k where floor(n / k) is constant.
+    """
+    total = 0
+    k = 1
+    while k <= n:
+        q = n // k
+        r = n // q
+        total += q*(k + r)*(r - k + 1) // 2
+        k = r + 1
+    return total
+
+
+def divisor_sum_summatories(n):
+    """
+        Returns a list of divisor_sum_summatory(m) for m = 0..n, by sieving
+        the divisor sums sigma(1), ..., sigma(n).
+    """
+    sigma = [0]*(n + 1)
+    for d in range(1, n + 1):
+        for m in range(d, n + 1, d):
+            sigma[m] += d
+    for m in range(1, n + 1):
+        sigma[m] += sigma[m - 1]
+    return sigma
+
+
+def sum_s(n):
+    """
+        Returns the sum of the sums of Gaussian divisors of integers 1..n, e.g.
+
+            sum_s(5) = s(1) + s(2) + s(3) + s(4) + s(5)
+
+        by counting rather than by finding divisors. The divisors of k with
+        positive real parts are the rational divisors d of k, and the
+        Gaussian integers d(a + bi) and d(a - bi), where a, b > 0 and
+        gcd(a, b) = 1, such that d(a^2 + b^2) divides k. So the sum over
+        k = 1..n is
+
+            S(n) + sum of 2a x S(floor(n / (a^2 + b^2))) over a, b > 0, gcd(a, b) = 1
+
+        where S(m) is the sum of k x floor(m / k) for k = 1..m, i.e. the sum
+        of the divisor sums sigma(1), ..., sigma(m). The pairs (a, b) and
+        (b, a) are taken together, S(m) for m up to n^(2/3) is looked up in a
+        sieved table, and the larger S(m) are summed in floor-division
+        blocks. Everything is in exact integer arithmetic.
+    """
+    if n < 1:
+        return 0
+    table_limit = max(1, round(n**(2/3)))
+    table = divisor_sum_summatories(table_limit)
+
+    def summatory(m):
+        return table[m] if m <= table_limit else divisor_sum_summatory(m)
+
+    total = summatory(n)
+    if n >= 2:
+        total += 2*summatory(n // 2)
+    for a in range(1, math.isqrt(n // 2) + 1):
+        aa = a*a
+        b_max = math.isqrt(n - aa)
+        # The norms a^2 + b^2 below n / table_limit need S(m) beyond the table
+        b_mid = min(b_max, max(a, math.isqrt(max(n // table_limit - aa, 0))))
+        total += 2*sum(
+            (a + b)*summatory(n // (aa + b*b))
+            for b in range(a + 1, b_mid + 1) if math.gcd(a, b) == 1
+        )
+        total += 2*sum(
+            (a + b)*table[n // (aa + b*b)]
+            for b in range(b_mid + 1, b_max + 1) if math.gcd(a, b) == 1
+        )
+    return total
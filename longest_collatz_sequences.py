@@ -16,10 +16,20 @@
 #
 # Which starting number, under one million, produces the longest chain?
 
-import sys
+import argparse
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils import chunk_ranges
 
 def collatz(n):
-    return int(n / 2) if n % 2 == 0 else 3*n + 1
+    return n // 2 if n % 2 == 0 else 3*n + 1
 
 def collatz_sequence_term(seed, k):
     if k == 1:
@@ -40,18 +50,251 @@ def collatz_sequence(seed):
         if n == 1:
             break
 
+def _collatz_jumps(k):
+    """
+    Returns tables for jumping k steps of the map n -> n / 2 (n even),
+    n -> (3n + 1) / 2 (n odd) at once. The parities of the first k steps
+    from n = 2^k q + r only depend on r, so after them
+
+        n -> 3^a q + c
+
+    where a is the number of odd steps. The tables hold 3^a, c and the
+    number of Collatz sequence terms passed, k + a, for every r < 2^k.
+    """
+    muls, adds, steps = [], [], []
+    for r in range(2**k):
+        m, n, s = 1, r, 0
+        for _ in range(k):
+            if n % 2:
+                m, n, s = 3*m, 3*n + 1, s + 1
+            n //= 2
+        muls.append(m)
+        adds.append(n)
+        steps.append(k + s)
+    return muls, adds, steps
+
+_JUMP_BITS = 8
+_JUMP_MULS, _JUMP_ADDS, _JUMP_STEPS = _collatz_jumps(_JUMP_BITS)
+
+def collatz_lengths(ubound):
+    """
+    Returns an array of the lengths of the Collatz sequences of all the seeds
+    below ubound, where the length of the sequence of a seed is the number of
+    terms including the seed and the final 1, e.g. the length for 13 is 10.
+    Index 0 is unused.
+
+    The lengths are computed for the seeds in [2^j, 2^(j + 1)) at a time, so
+    a sequence only needs to be followed until it drops below its seed,
+    where the rest of its length is already in the array:
+
+        * an even seed 2k drops to k after one step, so the even seeds are
+          filled in bulk from the previous interval
+        * an odd seed 4k + 1 drops to 3k + 1 after three steps
+        * an odd seed 4k + 3 is followed with jumps of 8 steps at a time from
+          tables of the residues mod 2^8, or one step at a time when it is
+          small, where an odd step is taken at once as n -> (3n + 1) / 2
+
+    The lengths are stored as unsigned 16-bit integers, which is about 200MB
+    for ubound = 10^8.
+    """
+    lengths = array('H', bytes(2*max(ubound, 2)))
+    lengths[1] = 1
+    muls, adds, jump_steps = _JUMP_MULS, _JUMP_ADDS, _JUMP_STEPS
+    mask = 2**_JUMP_BITS - 1
+    lo = 2
+    while lo < ubound:
+        hi = min(2*lo, ubound)
+        evens = len(range(lo, hi, 2))
+        lengths[lo:hi:2] = array('H', [m + 1 for m in lengths[lo // 2:lo // 2 + evens]])
+        for seed in range(lo + 1, hi, 2):
+            if seed % 4 == 1:
+                lengths[seed] = lengths[(3*seed + 1) // 4] + 3
+                continue
+            n, steps = seed, 0
+            while n >= seed:
+                if n > mask:
+                    r = n & mask
+                    n = muls[r]*(n >> _JUMP_BITS) + adds[r]
+                    steps += jump_steps[r]
+                elif n % 2:
+                    n = (3*n + 1) // 2
+                    steps += 2
+                else:
+                    n //= 2
+                    steps += 1
+            lengths[seed] = lengths[n] + steps
+        lo = hi
+    return lengths
+
 def longest_sequence_seed(ubound):
-    max_seq_seed = 1
-    max_seq_len = 1
-    for seed in range(1, ubound):
-        seq_len = sum(1 for t in collatz_sequence(seed))
-        if seq_len > max_seq_len:
-            max_seq_len = seq_len
-            max_seq_seed = seed
+    """
+    Returns the pair of the seed below ubound with the longest Collatz
+    sequence and the length of its sequence. The smallest such seed is
+    returned if there is a tie.
+    """
+    if ubound <= 2:
+        return 1, 1
+    lengths = collatz_lengths(ubound)
+    max_seq_len = max(lengths)
+    return lengths.index(max_seq_len), max_seq_len
+
+def collatz_length(seed, lengths=None):
+    """
+    Returns the length of the Collatz sequence of a seed in exact integer
+    arithmetic. If an array of lengths from collatz_lengths is given the
+    sequence is only followed until it drops below the end of the array.
+    Large terms are followed with the jumps of 8 steps of collatz_lengths.
+    """
+    limit = len(lengths) if lengths is not None else 2
+    mask = 2**_JUMP_BITS - 1
+    n, steps = seed, 0
+    while n >= limit:
+        if n > mask:
+            r = n & mask
+            n = _JUMP_MULS[r]*(n >> _JUMP_BITS) + _JUMP_ADDS[r]
+            steps += _JUMP_STEPS[r]
+        elif n % 2:
+            n = (3*n + 1) // 2
+            steps += 2
+        else:
+            n //= 2
+            steps += 1
+    return steps + (lengths[n] if lengths is not None else 1)
+
+_VECTOR_JUMP_BITS = 16
+_vector_jumps = None
+
+def _collatz_vector_jumps():
+    """
+    Returns the tables of _collatz_jumps for 16-step jumps as NumPy arrays,
+    building them once, for all the residues together.
+    """
+    global _vector_jumps
+    if _vector_jumps is None:
+        muls = np.ones(2**_VECTOR_JUMP_BITS, dtype=np.uint64)
+        adds = np.arange(2**_VECTOR_JUMP_BITS, dtype=np.uint64)
+        steps = np.full(2**_VECTOR_JUMP_BITS, _VECTOR_JUMP_BITS, dtype=np.uint32)
+        for _ in range(_VECTOR_JUMP_BITS):
+            odd = (adds & np.uint64(1)).astype(bool)
+            muls[odd] *= np.uint64(3)
+            adds[odd] = 3*adds[odd] + np.uint64(1)
+            steps += odd
+            adds >>= np.uint64(1)
+        _vector_jumps = muls, adds, steps
+    return _vector_jumps
+
+def collatz_lengths_vectorised(lo, hi, lengths):
+    """
+    Returns a NumPy array of the lengths of the Collatz sequences of the
+    seeds in the interval [lo, hi), advancing all the seeds in lock-step as
+    a vector of unsigned 64-bit integers. Every update jumps 16 steps at
+    once, n = 2^16 q + r -> 3^a q + c, with 3^a and c looked up for every
+    lane from tables of the residues r (see _collatz_jumps), so there are no
+    per-parity branches to mask. The lanes whose values have dropped below
+    the end of the array of lengths (from collatz_lengths) are finished by
+    looking up the rest of their lengths, and dropped from the vectors.
+    Lanes whose next jump could overflow 64 bits, or which drop below 2^16
+    but not below the end of a short array of lengths, are finished with
+    Python integers in collatz_length.
+    """
+    muls, adds, jump_steps = _collatz_vector_jumps()
+    shift = np.uint64(_VECTOR_JUMP_BITS)
+    mask = np.uint64(2**_VECTOR_JUMP_BITS - 1)
+    # (v >> 16) x 3^16 + c < 2^64 for all v below this bound
+    max_value = np.uint64(((2**64 - 2**_VECTOR_JUMP_BITS) // 3**_VECTOR_JUMP_BITS) << _VECTOR_JUMP_BITS)
+    table = np.frombuffer(lengths, dtype=np.uint16).astype(np.uint32)
+    # A jump from below 2^16 could run past 1 into the 4-2-1 cycle
+    limit = np.uint64(max(table.size, 2**_VECTOR_JUMP_BITS))
+
+    result = np.zeros(hi - lo, dtype=np.uint32)
+    values = np.arange(lo, hi, dtype=np.uint64)
+    steps = np.zeros(hi - lo, dtype=np.uint32)
+    lanes = np.arange(hi - lo)
+    while lanes.size:
+        done = values < limit
+        slow = values >= max_value
+        if table.size < limit:
+            slow |= done & (values >= table.size)
+        if slow.any():
+            for v, s, i in zip(values[slow], steps[slow], lanes[slow]):
+                result[i] = int(s) + collatz_length(int(v), lengths)
+            done |= slow
+        if done.any():
+            # Gather with the indices of the lanes rather than with boolean
+            # masks, which numpy would scan once per array
+            finished = np.flatnonzero(done & ~slow)
+            result[lanes[finished]] = steps[finished] + table[values[finished]]
+            keep = np.flatnonzero(~done)
+            values, steps, lanes = values[keep], steps[keep], lanes[keep]
+        r = (values & mask).astype(np.intp)
+        values >>= shift
+        values *= muls[r]
+        values += adds[r]
+        steps += jump_steps[r]
+    return result
+
+def longest_sequence_seed_vectorised(ubound, chunk_size=2**20, cache_size=2**18):
+    """
+    A NumPy version of longest_sequence_seed, which computes the lengths of
+    the seeds below ubound in chunks with collatz_lengths_vectorised, so
+    memory is bounded by the chunk size and the cache of the lengths of the
+    seeds below cache_size. It returns the same (seed, length) pair.
+    """
+    if np is None:
+        raise ImportError('longest_sequence_seed_vectorised requires NumPy')
+    if ubound <= 2:
+        return 1, 1
+    lengths = collatz_lengths(min(cache_size, ubound))
+    max_seq_seed, max_seq_len = 1, 1
+    for lo in range(1, ubound, chunk_size):
+        chunk = collatz_lengths_vectorised(lo, min(lo + chunk_size, ubound), lengths)
+        i = int(chunk.argmax())
+        if chunk[i] > max_seq_len:
+            max_seq_seed, max_seq_len = lo + i, int(chunk[i])
     return max_seq_seed, max_seq_len
 
+_worker_lengths = None
+
+def _init_worker(cache_size):
+    global _worker_lengths
+    _worker_lengths = collatz_lengths(cache_size)
+
+def longest_sequence_seed_in_range(seed_range):
+    """
+    Returns the pair of the seed in a range with the longest Collatz
+    sequence, the smallest one if there is a tie, and its length, using the
+    lengths cached by the worker process.
+    """
+    return max(
+        ((seed, collatz_length(seed, _worker_lengths)) for seed in seed_range),
+        key=lambda p: (p[1], -p[0])
+    )
+
+def longest_sequence_seed_parallel(ubound, workers, cache_size=2**20):
+    """
+    A multi-process version of longest_sequence_seed, which splits the seeds
+    below ubound into chunks that are searched in a pool of worker
+    processes. Each worker caches the lengths of the seeds below cache_size.
+    The results of the chunks are reduced deterministically by the maximum
+    length, and then by the smallest seed, so it returns the same
+    (seed, length) pair.
+    """
+    if ubound <= 2:
+        return 1, 1
+    cache_size = min(cache_size, ubound)
+    initargs = (cache_size,)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        results = pool.map(longest_sequence_seed_in_range, chunk_ranges(1, ubound, workers))
+        return max(results, key=lambda p: (p[1], -p[0]))
+
 if __name__ == '__main__':
-    ubound = int(sys.argv[1].strip())
-    max_seq_seed, max_seq_len = longest_sequence_seed(ubound)
-    print('\nLongest Collatz sequence stats for a seed < {}: seed = {}, length = {}.\n'.format(ubound, max_seq_seed, max_seq_len))
+    parser = argparse.ArgumentParser(description='Finds the seed below a bound with the longest Collatz sequence.')
+    parser.add_argument('ubound', type=int)
+    parser.add_argument('--workers', type=int, default=1, help='no. of worker processes')
+    args = parser.parse_args()
+    if args.workers > 1:
+        max_seq_seed, max_seq_len = longest_sequence_seed_parallel(args.ubound, args.workers)
+    else:
+        max_seq_seed, max_seq_len = longest_sequence_seed(args.ubound)
+    print('\nLongest Collatz sequence stats for a seed < {}: seed = {}, length = {}.\n'.format(args.ubound, max_seq_seed, max_seq_len))
 
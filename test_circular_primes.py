@@ -0,0 +1,48 @@
+import pytest
+
+from circular_primes import (
+    circular_prime_candidates,
+    circular_prime_classes,
+    circular_primes,
+    count_circular_primes,
+    is_candidate_circular_prime,
+    lyndon_words,
+)
+
+
+def test_circular_primes_below_100():
+    assert list(circular_primes(100)) == [2, 3, 5, 7, 11, 13, 17, 31, 37, 71, 73, 79, 97]
+
+
+def test_circular_primes_with_workers():
+    assert list(circular_primes(10**6, workers=2)) == list(circular_primes(10**6))
+
+
+def test_circular_primes_below_10_million():
+    assert sum(1 for _ in circular_primes(10**7)) == 55
+
+
+def test_is_candidate_circular_prime():
+    expected = [n for n in range(10**5) if n in (2, 3, 5, 7) or (n > 9 and set(str(n)) <= set('1379'))]
+    assert [n for n in range(10**5) if is_candidate_circular_prime(n)] == expected
+
+
+@pytest.mark.parametrize('lo, hi', [(0, 10**5), (5, 12), (2, 2), (1234, 98765)])
+def test_circular_prime_candidates(lo, hi):
+    assert list(circular_prime_candidates(range(lo, hi))) == [n for n in range(lo, hi) if is_candidate_circular_prime(n)]
+
+
+def test_lyndon_words():
+    assert list(lyndon_words(2, (1, 3))) == [(1,), (1, 3), (3,)]
+    assert sum(1 for w in lyndon_words(6, (1, 3, 7, 9)) if len(w) == 6) == 670
+
+
+def test_circular_prime_classes():
+    assert list(circular_prime_classes(100)) == [
+        (2,), (3,), (5,), (7,), (11,), (13, 31), (17, 71), (37, 73), (79, 97)
+    ]
+
+
+@pytest.mark.parametrize('ubound', [2, 3, 10, 12, 100, 200, 9999, 123457, 10**6])
+def test_count_circular_primes(ubound):
+    assert count_circular_primes(ubound) == sum(1 for _ in circular_primes(ubound))
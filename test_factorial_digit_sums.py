@@ -0,0 +1,72 @@
+import math
+import random
+import sys
+
+import pytest
+
+from factorial_digit_sums import (
+    digit_sum,
+    factorial_digit_sum,
+    factorial_digit_sums,
+    int_to_decimal,
+)
+
+if hasattr(sys, 'set_int_max_str_digits'):
+    sys.set_int_max_str_digits(0)
+
+
+def naive_digit_sum(n):
+    return sum(int(d) for d in str(abs(n)))
+
+
+@pytest.mark.parametrize('bits', [10, 100, 1000, 20000, 70000, 200000])
+def test_digit_sum(bits):
+    random.seed(bits)
+    for n in (random.getrandbits(bits) for _ in range(3)):
+        assert digit_sum(n) == naive_digit_sum(n)
+        assert int(int_to_decimal(n)) == n
+
+
+def test_digit_sum_small_and_negative():
+    assert [digit_sum(n) for n in (0, 9, 10, 9999, 10000, -12345, 10**5000 - 1)] == [0, 9, 1, 36, 1, 15, 45000]
+
+
+@pytest.mark.parametrize('n', [0, 1, 4, 10, 17, 100, 2500])
+def test_factorial_digit_sum(n):
+    assert factorial_digit_sum(n) == naive_digit_sum(math.factorial(n))
+
+
+def test_factorial_digit_sum_of_negative_integer():
+    with pytest.raises(ValueError):
+        factorial_digit_sum(-1)
+
+
+@pytest.mark.parametrize('strip_zeros', [False, True])
+def test_factorial_digit_sums(strip_zeros):
+    expected = [(n, factorial_digit_sum(n)) for n in range(300)]
+    assert list(factorial_digit_sums(range(300), strip_zeros=strip_zeros)) == expected
+    assert list(factorial_digit_sums(range(3, 300, 7), strip_zeros=strip_zeros)) == expected[3::7]
+
+
+def test_factorial_digit_sums_cache(tmp_path):
+    cache_path = str(tmp_path / 'digit_sums.txt')
+    expected = [(n, factorial_digit_sum(n)) for n in range(200)]
+    assert list(factorial_digit_sums(range(100), cache_path=cache_path)) == expected[:100]
+    assert list(factorial_digit_sums(range(200), cache_path=cache_path, strip_zeros=True)) == expected
+    with open(cache_path) as f:
+        assert len(f.read().splitlines()) == 200
+
+
+def test_factorial_digit_sums_of_negative_integers():
+    with pytest.raises(ValueError):
+        list(factorial_digit_sums(range(-3, 5)))
+    with pytest.raises(ValueError):
+        list(factorial_digit_sums(range(5, -3, -1)))
+
+
+def test_factorial_digit_sums_cache_with_partial_line(tmp_path):
+    cache_path = tmp_path / 'digit_sums.txt'
+    cache_path.write_text('1 1\n2 2\nx y\n3 6\n4 2')
+    expected = [(n, factorial_digit_sum(n)) for n in range(10)]
+    assert list(factorial_digit_sums(range(10), cache_path=str(cache_path))) == expected
+    assert list(factorial_digit_sums(range(10), cache_path=str(cache_path))) == expected
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from gaussian_integers import (
+    divisor_sum_summatories,
+    divisor_sum_summatory,
+    gaussian_divisors,
+    gaussian_factor,
+    s,
+    sum_s,
+    sum_s_brute_force,
+    two_squares,
+)
+from utils import (
+    GaussianInt,
+    is_prime,
+)
+
+
+def test_s():
+    assert [s(n) for n in range(1, 6)] == [1, 5, 4, 13, 12]
+    assert s(1 + 2j) == 4
+
+
+def test_gaussian_divisors():
+    assert sorted(map(str, gaussian_divisors(5))) == sorted([
+        '1', 'i', '-1', '-i', '5', '5i', '-5', '-5i',
+        '1+2i', '-2+i', '-1-2i', '2-i', '2+i', '-1+2i', '-2-i', '1-2i',
+    ])
+
+
+def test_divisor_sum_summatories():
+    assert divisor_sum_summatories(500) == [divisor_sum_summatory(m) for m in range(501)]
+
+
+@pytest.mark.parametrize('n', list(range(0, 40)) + [100])
+def test_sum_s_agrees_with_brute_force(n):
+    assert sum_s(n) == sum_s_brute_force(n)
+
+
+def test_sum_s():
+    assert sum_s(5) == 35
+    assert sum_s(10**5) == 17924657155
+
+
+def test_two_squares():
+    for p in filter(is_prime, range(5, 10**4, 4)):
+        a, b = two_squares(p)
+        assert a > b > 0 and a*a + b*b == p
+
+
+def test_gaussian_factor():
+    random.seed(14)
+    for _ in range(500):
+        g = GaussianInt(random.randint(-10**6, 10**6), random.randint(-10**6, 10**6)) or GaussianInt(1, 0)
+        u, factors = gaussian_factor(g)
+        assert u.norm() == 1
+        assert all(q.normalised() == q and q.norm() > 1 for q, _ in factors)
+        product = u
+        for q, e in factors:
+            product *= q**e
+        assert product == g
+    assert gaussian_factor(5) == (GaussianInt(0, -1), [(GaussianInt(1, 2), 1), (GaussianInt(2, 1), 1)])
+
+
+@pytest.mark.parametrize('g', [1, 2, 12, 25, 97, 360, GaussianInt(3, 1), GaussianInt(-7, 24), GaussianInt(0, 30)])
+def test_gaussian_divisors_agree_with_trial_division(g):
+    z = GaussianInt.from_number(g)
+    n = z.norm()
+    expected = [
+        GaussianInt(a, b)
+        for a in range(-n, n + 1) for b in range(-n, n + 1)
+        if (a or b) and a*a + b*b <= n and z.is_divisible_by(GaussianInt(a, b))
+    ]
+    assert sorted(map(str, gaussian_divisors(g))) == sorted(map(str, expected))
+
+
+def test_s_of_large_integers():
+    assert s(2**40) == 2**41 - 1 + 2*sum(2**k for k in range(41))
@@ -0,0 +1,56 @@
+import pytest
+
+from longest_collatz_sequences import (
+    collatz_length,
+    collatz_lengths,
+    collatz_lengths_vectorised,
+    collatz_sequence,
+    longest_sequence_seed,
+    longest_sequence_seed_parallel,
+    longest_sequence_seed_vectorised,
+)
+
+
+def test_collatz_lengths_agree_with_sequences():
+    lengths = collatz_lengths(5000)
+    assert all(lengths[seed] == sum(1 for _ in collatz_sequence(seed)) for seed in range(2, 5000))
+    assert lengths[13] == 10
+
+
+def test_collatz_sequence_is_exact_for_large_seeds():
+    seed = 2**60 + 1
+    assert list(collatz_sequence(seed))[1] == 3*seed + 1
+    assert list(collatz_sequence(2**80))[-2:] == [2, 1]
+
+
+def test_longest_sequence_seed():
+    assert longest_sequence_seed(2) == (1, 1)
+    assert longest_sequence_seed(10) == (9, 20)
+    assert longest_sequence_seed(10**6) == (837799, 525)
+
+
+def test_collatz_lengths_vectorised():
+    pytest.importorskip('numpy')
+    lengths = collatz_lengths(1000)
+    assert list(collatz_lengths_vectorised(1, 10**4, lengths)) == list(collatz_lengths(10**4)[1:])
+    # Seeds whose odd steps overflow 64 bits are finished with Python ints
+    lo = 2**64 - 500
+    assert list(collatz_lengths_vectorised(lo, 2**64, lengths)) == [collatz_length(seed) for seed in range(lo, 2**64)]
+
+
+@pytest.mark.parametrize('ubound', [2, 3, 10, 1000, 10**5])
+def test_longest_sequence_seed_vectorised(ubound):
+    pytest.importorskip('numpy')
+    assert longest_sequence_seed_vectorised(ubound, chunk_size=777, cache_size=100) == longest_sequence_seed(ubound)
+
+
+@pytest.mark.parametrize('ubound', [2, 3, 4, 5, 17, 300, 1025, 4099])
+def test_collatz_lengths_for_every_bound(ubound):
+    lengths = collatz_lengths(ubound)
+    assert len(lengths) == max(ubound, 2)
+    assert all(lengths[seed] == sum(1 for _ in collatz_sequence(seed)) for seed in range(2, ubound))
+
+
+@pytest.mark.parametrize('ubound', [2, 10, 12345])
+def test_longest_sequence_seed_parallel(ubound):
+    assert longest_sequence_seed_parallel(ubound, workers=2, cache_size=50) == longest_sequence_seed(ubound)
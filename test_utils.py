@@ -0,0 +1,166 @@
+import math
+import random
+
+import pytest
+
+from utils import (
+    _MILLER_RABIN_WITNESSES,
+    GaussianInt,
+    PrimeSieve,
+    chunk_ranges,
+    factorisation,
+    gaussian_gcd,
+    is_prime,
+    is_strong_lucas_probable_prime,
+    is_strong_probable_prime,
+    num_digits,
+    prime_factors,
+    prime_factors_range,
+    primes,
+    rotations,
+)
+
+
+def trial_division_is_prime(n):
+    return n > 1 and all(n % d for d in range(2, math.isqrt(n) + 1))
+
+
+def test_sieve_agrees_with_trial_division():
+    sieve = PrimeSieve(segment_size=64, table_limit=1000)
+    expected = [n for n in range(5000) if trial_division_is_prime(n)]
+    assert list(sieve.primes(0, 5000)) == expected
+    assert [n for n in range(5000) if sieve.is_prime(n)] == expected
+    assert [n for n in range(-5, 5000) if is_prime(n)] == [n for n in range(-5, 5000) if trial_division_is_prime(n)]
+
+
+def test_sieve_does_not_grow_past_table_limit():
+    sieve = PrimeSieve(segment_size=64, table_limit=1000)
+    window = list(sieve.primes(10**7, 10**7 + 500))
+    assert window == [n for n in range(10**7, 10**7 + 500) if trial_division_is_prime(n)]
+    assert sieve.is_prime(10**9 + 7)
+    assert not sieve.is_prime(10**9 + 9*10**4 + 1)
+    assert sieve.is_prime(10**18 + 9)
+    assert sieve.limit <= 1000
+
+
+def test_primes_options():
+    assert list(primes(index_range=range(1, 11))) == [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+    assert list(primes(index_range=range(20, 23))) == [71, 73, 79]
+    assert list(primes(int_range=range(100, 130))) == [101, 103, 107, 109, 113, 127]
+    assert list(primes(int_range=range(2, 2))) == []
+    assert list(primes(index_range=range(0, 0))) == []
+
+
+@pytest.mark.parametrize('n', [
+    2047,
+    3215031751,
+    3825123056546413051,
+    318665857834031151167461,
+    (2**61 - 1)*(2**89 - 1),
+])
+def test_strong_pseudoprimes_are_composite(n):
+    assert not is_prime(n)
+
+
+@pytest.mark.parametrize('n', [2**61 - 1, 2**89 - 1, 2**127 - 1, 10**18 + 9])
+def test_large_primes(n):
+    assert is_prime(n)
+
+
+def test_miller_rabin_and_baillie_psw_agree_with_sieve():
+    sieve = PrimeSieve()
+    for n in range(5, 20001, 2):
+        expected = sieve.is_prime(n)
+        assert (is_strong_probable_prime(n, 2) and is_strong_lucas_probable_prime(n)) == expected
+        for _, witnesses in _MILLER_RABIN_WITNESSES:
+            assert all(is_strong_probable_prime(n, a) for a in witnesses) == expected
+
+
+@pytest.mark.parametrize('n', [
+    1, 2, 54, 360, 10**7, 10**7 + 1, 600851475143, 2**64 - 1, 10**18 + 1,
+    3*(2**61 - 1)**2, 97**7, 1000003**3*1000033**2,
+])
+def test_factorisation(n):
+    factors = factorisation(n)
+    assert math.prod(p**e for p, e in factors) == n
+    assert all(is_prime(p) for p, _ in factors)
+    assert [p for p, _ in factors] == sorted({p for p, _ in factors})
+
+
+def test_prime_factors():
+    assert list(prime_factors(54)) == [2, 3]
+    assert list(prime_factors(54, multiplicities=True)) == [(2, 1), (3, 3)]
+    assert list(prime_factors(1)) == []
+
+
+@pytest.mark.parametrize('lo, hi', [(1, 2000), (10**12, 10**12 + 300)])
+def test_prime_factors_range(lo, hi):
+    assert list(prime_factors_range(lo, hi, segment_size=97)) == [(n, factorisation(n)) for n in range(lo, hi)]
+
+
+def test_chunk_ranges():
+    assert chunk_ranges(0, 100, 2, min_chunk_size=20) == [range(0, 20), range(20, 40), range(40, 60), range(60, 80), range(80, 100)]
+    assert chunk_ranges(1, 10**6, 4, min_chunk_size=10) == [range(a, min(a + 62500, 10**6)) for a in range(1, 10**6, 62500)]
+
+
+def test_rotations():
+    assert list(rotations(1234)) == [4123, 3412, 2341, 1234]
+    assert list(rotations(102)) == [210, 21, 102]
+    assert list(rotations(7)) == [7]
+
+
+def test_num_digits():
+    for n in list(range(1000)) + [10**k + e for k in range(1, 100) for e in (-1, 0, 1)]:
+        assert num_digits(n) == len(str(n))
+
+
+def test_gaussian_int_divmod_is_exact():
+    random.seed(13)
+    for _ in range(2000):
+        z = GaussianInt(random.randint(-10**30, 10**30), random.randint(-10**30, 10**30))
+        w = GaussianInt(random.randint(-10**6, 10**6), random.randint(1, 10**6))
+        q, r = divmod(z, w)
+        assert q*w + r == z
+        assert 2*r.norm() <= w.norm()
+        assert (z*w).is_divisible_by(w)
+
+
+def test_gaussian_int():
+    z = GaussianInt(3, 4)
+    assert z.norm() == 25 and z*z.conjugate() == 25
+    assert GaussianInt(1, 2) == 1 + 2j and hash(GaussianInt(5, 0)) == hash(5)
+    assert list(GaussianInt(1, 2).associates()) == [GaussianInt(1, 2), GaussianInt(-2, 1), GaussianInt(-1, -2), GaussianInt(2, -1)]
+    assert GaussianInt(-2, 1).normalised() == GaussianInt(1, 2)
+    assert [str(GaussianInt(*p)) for p in [(1, -1), (0, 2), (-3, 0), (0, -1)]] == ['1-i', '2i', '-3', '-i']
+    assert gaussian_gcd(5, GaussianInt(3, 4)) == GaussianInt(2, 1)
+    assert gaussian_gcd(12, 18) == 6
+
+
+def test_gaussian_int_powers():
+    z = GaussianInt(1, 2)
+    assert z**0 == 1 and z**3 == z*z*z
+    assert GaussianInt(0, 1)**-1 == GaussianInt(0, -1)
+    assert GaussianInt(-1, 0)**-3 == -1
+    with pytest.raises(ValueError):
+        z**-1
+
+
+def test_gaussian_int_conversions():
+    assert GaussianInt.from_number(3.0) == GaussianInt(3, 0)
+    assert GaussianInt.from_number(2 - 5j) == GaussianInt(2, -5)
+    for z in (2.5, 1 + 0.5j):
+        with pytest.raises(ValueError):
+            GaussianInt.from_number(z)
+    with pytest.raises(TypeError):
+        GaussianInt.from_number('1')
+    with pytest.raises(TypeError):
+        GaussianInt(1, 2) + 0.5
+    with pytest.raises(TypeError):
+        GaussianInt(1, 2)*(1 + 1j)
+
+
+def test_gaussian_int_hashes_like_complex():
+    assert len({GaussianInt(1, 2), 1 + 2j}) == 1
+    for a, b in [(0, 0), (7, 0), (-3, 1), (1, -1), (2**40, -2**45), (-1, 0)]:
+        assert GaussianInt(a, b) == complex(a, b)
+        assert hash(GaussianInt(a, b)) == hash(complex(a, b))
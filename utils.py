@@ -1,6 +1,12 @@
 import math
+import sys
 
+from array import array
+from collections import Counter
 from itertools import (
+    count,
+    compress,
+    islice,
     permutations,
     starmap,
 )
@@ -35,16 +41,50 @@ def int_from_digits(digits):
     return sum(d*10**i for d, i in zip(dgs, reversed(range(n))))
 
 
+_powers_of_ten = [1]
+
+
+def power_of_ten(k):
+    """
+        Returns 10^k from a cache of powers of ten.
+    """
+    while len(_powers_of_ten) <= k:
+        _powers_of_ten.append(10*_powers_of_ten[-1])
+    return _powers_of_ten[k]
+
+
+def num_digits(n):
+    """
+        Returns the number of digits of a non-negative integer n, counting 0
+        as a single digit, without converting n to a string, e.g.
+
+            0 -> 1, 9 -> 1, 10 -> 2, 12345 -> 5
+    """
+    k = max(1, (n.bit_length()*30103) // 100000)
+    while n >= power_of_ten(k):
+        k += 1
+    return k
+
+
 def rotations(n):
     """
         Generates a sequence of (right) rotations of a positive integer n, e.g.
 
             1234 -> 4123, 3412, 2341, 1234
+
+        Each rotation is obtained from the last in integer arithmetic as
+
+            (n mod 10) x 10^(d - 1) + n // 10
+
+        where d is the number of digits of n, so a rotation with a leading
+        0 is a shorter integer, e.g. 102 -> 210, 21, 102.
     """
-    digs = list(digits(n, reverse=True))
-    n = len(digs)
-    for i in range(n):
-        yield sum(digs[(j + i) % n] * 10**j for j in range(n))
+    d = num_digits(n)
+    p = power_of_ten(d - 1)
+    m = n
+    for _ in range(d):
+        m = (m % 10)*p + m // 10
+        yield m
 
 
 def int_permutations(n):
@@ -68,24 +108,273 @@ def concatenate(int_seq):
     return int(''.join([str(n) for n in int_seq]))
 
 
-def is_prime(n):
+def chunk_ranges(lo, hi, workers, min_chunk_size=10**4, chunks_per_worker=4):
+    """
+        Splits the interval [lo, hi) into consecutive ranges for a pool of
+        worker processes. There are about 'chunks_per_worker' chunks per
+        worker, so that an uneven load can be balanced, but no chunk is
+        smaller than 'min_chunk_size' (except the last), so that the cost of
+        starting a worker and pickling a task is amortised, e.g.
+
+            >>> chunk_ranges(0, 100, 2, min_chunk_size=20)
+            [range(0, 20), range(20, 40), range(40, 60), range(60, 80), range(80, 100)]
+    """
+    size = max(min_chunk_size, -(-(hi - lo) // (workers*chunks_per_worker)), 1)
+    return [range(a, min(a + size, hi)) for a in range(lo, hi, size)]
+
+
+class PrimeSieve:
+    """
+        A segmented sieve of Eratosthenes which grows on demand. The sieve
+        only stores flags for the odd integers, so that the flag for 2i + 1 is
+        at index i of a bytearray, and it is extended one segment at a time,
+        using the primes already in the table to sieve the next segment, e.g.
+
+            >>> sieve = PrimeSieve()
+            >>> sieve.is_prime(97)
+            True
+            >>> list(sieve.primes(10, 30))
+            [11, 13, 17, 19, 23, 29]
+
+        The table is only grown up to 'table_limit' - primes in windows
+        beyond that are generated from temporary segments which are sieved
+        and then discarded. The base primes for those segments, up to the
+        square root of the end of the window, are looked up in the table if
+        they are within it, or streamed into a temporary list otherwise, so
+        memory use is bounded by the table, one segment and the base primes.
+    """
+    def __init__(self, segment_size=2**18, table_limit=2**25):
+        self.segment_size = segment_size + segment_size % 2
+        self.table_limit = table_limit
+        self._limit = 8
+        self._odd = bytearray([0, 1, 1, 1])
+
+    @property
+    def limit(self):
+        """
+            The table holds flags for all the integers below this limit.
+        """
+        return self._limit
+
+    def extend(self, n):
+        """
+            Extends the table so that it holds flags for all the integers
+            below n. The table at least doubles in size each time it grows,
+            to amortise the cost of growing it a little at a time, but the
+            doubling stops at the table limit.
+        """
+        if n <= self._limit:
+            return
+        n = max(n, min(2*self._limit, self.table_limit))
+        n += n % 2
+        base = self.odd_primes_below(math.isqrt(n) + 1)
+        for lo in range(self._limit, n, self.segment_size):
+            self._odd += self.sieve_segment(lo, min(lo + self.segment_size, n), base)
+        self._limit = n
+
+    def odd_primes_below(self, n):
+        """
+            Returns a list of the odd primes below n, extending the table
+            first if n is within the table limit, or else sieving them in
+            temporary segments.
+        """
+        if n > self.table_limit:
+            return list(self.primes(3, n))
+        self.extend(n)
+        return list(compress(range(1, n, 2), self._odd))
+
+    @staticmethod
+    def sieve_segment(lo, hi, base):
+        """
+            Sieves the odd integers in the interval [lo, hi), where lo and hi
+            are even, with a list of odd primes 'base' containing all the odd
+            primes up to the square root of hi. Returns a bytearray of flags
+            where the flag for lo + 2i + 1 is at index i.
+        """
+        seg = bytearray(b'\x01') * ((hi - lo) // 2)
+        for p in base:
+            start = p*p
+            if start >= hi:
+                break
+            if start < lo:
+                start = lo + (-lo) % p
+                if start % 2 == 0:
+                    start += p
+            i = (start - lo) // 2
+            seg[i::p] = bytes(len(range(i, len(seg), p)))
+        if lo == 0 and seg:
+            seg[0] = 0
+        return seg
+
+    def is_prime(self, n):
+        """
+            Checks whether n is prime by a table lookup. The table is extended
+            if n is beyond it but not beyond the table limit, otherwise the
+            check is deferred to the module level 'is_prime', which does not
+            use the table for such n.
+        """
+        if n < 2:
+            return False
+        if n % 2 == 0:
+            return n == 2
+        if n < self.table_limit:
+            self.extend(n + 1)
+            return self._odd[n // 2] == 1
+        return is_prime(n)
+
+    def primes(self, lo=2, hi=None):
+        """
+            Generates the primes in the interval [lo, hi), or all the primes
+            from lo onwards if hi is None, one segment at a time.
+        """
+        if lo <= 2 and (hi is None or hi > 2):
+            yield 2
+        lo = max(lo, 3)
+        lo -= lo % 2
+        base, base_limit = [], 0
+        while hi is None or lo < hi:
+            seg_hi = lo + self.segment_size
+            if hi is not None:
+                seg_hi = min(seg_hi, hi + hi % 2)
+            if seg_hi <= self.table_limit:
+                self.extend(seg_hi)
+                flags = self._odd[lo // 2:seg_hi // 2]
+            else:
+                if math.isqrt(seg_hi) >= base_limit:
+                    base_limit = 2*math.isqrt(seg_hi) + 2
+                    if hi is not None:
+                        base_limit = min(base_limit, math.isqrt(hi) + 2)
+                    base = self.odd_primes_below(base_limit)
+                flags = self.sieve_segment(lo, seg_hi, base)
+            for p in compress(range(lo + 1, seg_hi, 2), flags):
+                if hi is not None and p >= hi:
+                    return
+                yield p
+            lo = seg_hi
+
+
+_sieve = PrimeSieve()
+
+
+_SMALL_PRIMES = (3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47)
+
+# Witness sets for which the Miller-Rabin test is deterministic below the
+# corresponding bound - the 7-witness set for 64-bit integers is due to
+# J. Sinclair and the first 12 primes suffice below ~3.18 x 10^23.
+_MILLER_RABIN_WITNESSES = (
+    (2**64, (2, 325, 9375, 28178, 450775, 9780504, 1795265022)),
+    (318665857834031151167461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+)
+
+
+def jacobi_symbol(a, n):
     """
-        Simple but fairly quick primality checker.
+        Returns the Jacobi symbol (a/n) for an odd positive integer n, which
+        is one of -1, 0 or 1.
     """
-    if n == 1:
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def is_strong_probable_prime(n, a):
+    """
+        Checks whether an odd integer n > 2 is a strong probable prime to the
+        base a, which is the Miller-Rabin test for a single witness a. Every
+        prime passes this test, but so do some composites, e.g. 2047 =
+        23 x 89 is a strong probable prime to the base 2.
+    """
+    a %= n
+    if a == 0:
+        return True
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(s - 1):
+        x = x*x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def is_strong_lucas_probable_prime(n):
+    """
+        Checks whether an odd integer n > 2 is a strong Lucas probable prime
+        with the parameters P = 1, Q = (1 - D) / 4 chosen by Selfridge's
+        method, where D is the first of 5, -7, 9, -11, ... such that the
+        Jacobi symbol (D/n) = -1. Combined with a strong probable prime test
+        to the base 2 this is the Baillie-PSW test, for which no composite
+        counterexample is known.
+    """
+    if math.isqrt(n)**2 == n:
         return False
+    D = 5
+    while True:
+        j = jacobi_symbol(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    P, Q = 1, (1 - D) // 4
+
+    d = n + 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+
+    def halve(x):
+        x %= n
+        return (x + n if x % 2 else x) // 2
 
-    if n == 2:
+    U, V, Qk = 1, P, Q % n
+    for bit in bin(d)[3:]:
+        U, V = U*V % n, (V*V - 2*Qk) % n
+        Qk = Qk*Qk % n
+        if bit == '1':
+            U, V = halve(P*U + V), halve(D*U + P*V)
+            Qk = Qk*Q % n
+    if U == 0 or V == 0:
         return True
+    for _ in range(s - 1):
+        V = (V*V - 2*Qk) % n
+        Qk = Qk*Qk % n
+        if V == 0:
+            return True
+    return False
 
-    if n % 2 == 0:
+
+def is_prime(n):
+    """
+        Primality checker which tries the fastest method that is exact for n.
+        Small n are checked by a lookup in a sieve of Eratosthenes table.
+        Larger n are checked for small prime factors, and then with a
+        deterministic Miller-Rabin test if n is below ~3.18 x 10^23 (which
+        includes all 64-bit integers), or with the Baillie-PSW strong
+        probable prime test otherwise.
+    """
+    if n < _sieve.table_limit:
+        return _sieve.is_prime(n)
+
+    if n % 2 == 0 or any(n % p == 0 for p in _SMALL_PRIMES):
         return False
-    
-    for i in range(3, int(n**(1/2) + 1), 2):
-        if n % i == 0:
-            return False    
 
-    return True
+    for bound, witnesses in _MILLER_RABIN_WITNESSES:
+        if n < bound:
+            return all(is_strong_probable_prime(n, a) for a in witnesses)
+
+    return is_strong_probable_prime(n, 2) and is_strong_lucas_probable_prime(n)
 
 
 def primes(index_range=None, int_range=None):
@@ -94,32 +383,229 @@ def primes(index_range=None, int_range=None):
         given index range (e.g. the first 50 primes, or the 20th to the 50th
         primes) by using the 'index_range' option, or a given interval for
         the primes (e.g. primes between 100 and 1000) by using the
-        'int_range' option.
-    """    
-    if index_range:
-        n = 2
-        i = 1
-        while i not in index_range:
-            if is_prime(n):
-                i += 1
-            n += 1
-        while i in index_range:
-            if is_prime(n):
-                yield n
-                i += 1
-            n += 1
+        'int_range' option. The primes are streamed from a segmented sieve
+        rather than tested one at a time.
+    """
+    if index_range is not None:
+        start = max(index_range.start, 1)
+        stop = max(index_range.stop, start)
+        yield from islice(_sieve.primes(), start - 1, stop - 1, index_range.step)
         return
-    elif int_range:
-        for n in int_range:
-            if is_prime(n):
-                yield n
+    elif int_range is not None:
+        if int_range.step == 1:
+            yield from _sieve.primes(int_range.start, int_range.stop)
+        else:
+            for n in int_range:
+                if is_prime(n):
+                    yield n
         return
 
-    n = 2
+    yield from _sieve.primes()
+
+
+class SmallestPrimeFactorTable:
+    """
+        A table of the smallest prime factor (SPF) of every integer below a
+        configurable limit, which is grown on demand (at least doubling in
+        size each time) up to that limit. Factorising an integer in the
+        table only takes a lookup per prime factor, e.g.
+
+            >>> table = SmallestPrimeFactorTable(limit=10**6)
+            >>> list(table.factorisation(360))
+            [(2, 3), (3, 2), (5, 1)]
+
+        The table is stored as an unsigned 32-bit array, so the limit should
+        not be more than 2^32.
+    """
+    def __init__(self, limit=10**7):
+        self.limit = limit
+        self._spf = array('I', range(2))
+
+    def extend(self, n):
+        """
+            Rebuilds the table so that it holds all the integers below n, or
+            below the table limit if that is smaller.
+        """
+        size = len(self._spf)
+        if n <= size or size >= self.limit:
+            return
+        size = min(max(n, 2*size), self.limit)
+        spf = array('I', range(size))
+        for p in reversed(list(_sieve.primes(2, math.isqrt(size - 1) + 1))):
+            spf[p*p::p] = array('I', [p])*len(range(p*p, size, p))
+        self._spf = spf
+
+    def factorisation(self, n):
+        """
+            Generates the pairs (p, e) of prime factors p of n, in ascending
+            order, and their multiplicities e. Requires n to be below the
+            table limit.
+        """
+        self.extend(n + 1)
+        spf = self._spf
+        while n > 1:
+            p = spf[n]
+            e = 0
+            while n % p == 0:
+                n //= p
+                e += 1
+            yield p, e
+
+
+_spf_table = SmallestPrimeFactorTable()
+
+
+def integer_root(n, k):
+    """
+        Returns the integer part of the kth root of a non-negative integer n,
+        computed with Newton's method in exact integer arithmetic.
+    """
+    if n < 2:
+        return n
+    x = 1 << -(-n.bit_length() // k)
     while True:
-        if is_prime(n):
-            yield n
-        n += 1
+        y = ((k - 1)*x + n // x**(k - 1)) // k
+        if y >= x:
+            return x
+        x = y
+
+
+def perfect_power(n):
+    """
+        Returns a pair (r, k) such that n = r^k with k as large as possible,
+        e.g.
+
+            64 -> (2, 6)
+            72 -> (72, 1)
+    """
+    r, k = n, 1
+    for p in _sieve.primes(2, n.bit_length() + 1):
+        while True:
+            s = integer_root(r, p)
+            if s**p != r:
+                break
+            r, k = s, k*p
+    return r, k
+
+
+def pollard_brent(n):
+    """
+        Returns a non-trivial factor of an odd composite integer n using
+        Brent's variant of Pollard's rho algorithm, which iterates
+
+            x -> x^2 + c (mod n)
+
+        for c = 1, 2, ... until it finds a factor, and which batches the gcd
+        computations by accumulating products of differences.
+    """
+    if n % 2 == 0:
+        return 2
+    m = 128
+    for c in count(1):
+        y, r, q, g = 2, 1, 1, 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y*y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y*y + c) % n
+                    q = q*abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys*ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def factorisation(n):
+    """
+        Returns the prime factorisation of a positive integer n as an ordered
+        list of pairs (p, e) of prime factors p and their multiplicities e,
+        e.g. for n = 54 = 2^1 x 3^3 we have
+
+            54 -> [(2, 1), (3, 3)]
+
+        Integers below the smallest prime factor table limit are factorised
+        with table lookups. Larger integers are stripped of small prime
+        factors and then split with Pollard-Brent rho, after checking for
+        perfect powers (which rho is slow to split), until every factor is
+        either prime or small enough for the table. The multiplicities are
+        counted exactly by repeated division.
+    """
+    if n < _spf_table.limit:
+        return list(_spf_table.factorisation(n))
+
+    factors = Counter()
+    for p in (2,) + _SMALL_PRIMES:
+        while n % p == 0:
+            n //= p
+            factors[p] += 1
+
+    stack = [(n, 1)] if n > 1 else []
+    while stack:
+        m, e = stack.pop()
+        if m < _spf_table.limit:
+            for p, f in _spf_table.factorisation(m):
+                factors[p] += e*f
+        elif is_prime(m):
+            factors[m] += e
+        else:
+            r, k = perfect_power(m)
+            if k > 1:
+                stack.append((r, e*k))
+            else:
+                d = pollard_brent(m)
+                stack.extend(((d, e), (m // d, e)))
+
+    return sorted(factors.items())
+
+
+def prime_factors_range(lo, hi, segment_size=2**16):
+    """
+        Generates pairs (n, [(p, e), ...]) of the integers n in the interval
+        [lo, hi) and their prime factorisations, e.g.
+
+            >>> list(prime_factors_range(10, 13))
+            [(10, [(2, 1), (5, 1)]), (11, [(11, 1)]), (12, [(2, 2), (3, 1)])]
+
+        This is a segmented sieve over the interval: for every prime p up to
+        the square root of hi the multiples of p in the current segment are
+        divided by p as often as possible, and whatever is left of each n
+        at the end is either 1 or a single prime factor greater than the
+        square root. Memory use is bounded by the segment size and the primes
+        up to the square root of hi, so windows far from the origin can be
+        factorised without generating all the primes below hi.
+    """
+    lo = max(lo, 1)
+    if hi <= lo:
+        return
+    base = list(_sieve.primes(2, math.isqrt(hi - 1) + 1))
+    for seg_lo in range(lo, hi, segment_size):
+        seg_hi = min(seg_lo + segment_size, hi)
+        size = seg_hi - seg_lo
+        rem = list(range(seg_lo, seg_hi))
+        factors = [[] for _ in range(size)]
+        for p in base:
+            for i in range(-seg_lo % p, size, p):
+                m = rem[i] // p
+                e = 1
+                while m % p == 0:
+                    m //= p
+                    e += 1
+                rem[i] = m
+                factors[i].append((p, e))
+        for i, m in enumerate(rem):
+            if m > 1:
+                factors[i].append((m, 1))
+            yield seg_lo + i, factors[i]
 
 
 def prime_factors(n, multiplicities=False):
@@ -135,24 +621,11 @@ def prime_factors(n, multiplicities=False):
 
         This is precisely the prime factorisation of n.
     """
-    if n == 1:
-        return
-
-    if is_prime(n):
+    for p, e in factorisation(n):
         if not multiplicities:
-            yield n
-        else:
-            yield n, 1
-        return
-
-    pf = (p for p in primes(int_range=range(2, math.ceil(math.sqrt(n)))) if n % p == 0)
-    if not multiplicities:
-        for p in pf:
             yield p
-    else:
-        pfm = ((p, max(e for e in reversed(range(1, math.ceil(math.log(n, p)))) if n % p**e == 0)) for p in pf)
-        for p, m in pfm:
-            yield p, m
+        else:
+            yield p, e
 
 
 def fibonacci():
@@ -319,3 +792,234 @@ def complex_divide(z1, z2):
     m = c**2 + d**2
     u, v = map(integerise, [(a*c + b*d) / m, (b*c - a*d) / m])
     return complex(u, v)
+
+
+class GaussianInt:
+    """
+        An exact Gaussian integer a + bi, where a and b are Python ints, as a
+        replacement for Python complex numbers, which are pairs of floats and
+        so are inexact for parts beyond 2^53, e.g.
+
+            >>> z = GaussianInt(3, 4)
+            >>> z*z.conjugate()
+            GaussianInt(25, 0)
+            >>> divmod(GaussianInt(7, 2), GaussianInt(1, 1))
+            (GaussianInt(5, -2), GaussianInt(0, -1))
+
+        The parts are named 'real' and 'imag' as for complex numbers, and a
+        GaussianInt compares equal to (and hashes like) an int, float or
+        complex with the same value. Arithmetic is only defined with other
+        GaussianInts and ints, so that it stays exact.
+    """
+    __slots__ = ('real', 'imag')
+
+    def __init__(self, real=0, imag=0):
+        self.real = real
+        self.imag = imag
+
+    @classmethod
+    def from_number(cls, z):
+        """
+            Converts an int, or a float or complex number with integral parts,
+            or a GaussianInt, to a GaussianInt. Raises a ValueError for a
+            float or complex number with a fractional part, and a TypeError
+            for any other type.
+        """
+        if isinstance(z, cls):
+            return z
+        if isinstance(z, int):
+            return cls(z, 0)
+        if isinstance(z, (float, complex)):
+            z = complex(z)
+            if not (z.real.is_integer() and z.imag.is_integer()):
+                raise ValueError('{} is not a Gaussian integer'.format(z))
+            return cls(int(z.real), int(z.imag))
+        raise TypeError('cannot convert {} to a GaussianInt'.format(type(z).__name__))
+
+    @classmethod
+    def _operand(cls, z):
+        """
+            The exact operand of an arithmetic operation - a GaussianInt, or
+            an int as a GaussianInt, or None for any other type, for which
+            the operation returns NotImplemented.
+        """
+        if isinstance(z, cls):
+            return z
+        if isinstance(z, int):
+            return cls(z, 0)
+        return None
+
+    def __repr__(self):
+        return 'GaussianInt({}, {})'.format(self.real, self.imag)
+
+    def __str__(self):
+        if not self.imag:
+            return str(self.real)
+        imag = '{}i'.format(self.imag) if abs(self.imag) != 1 else '-i' if self.imag < 0 else 'i'
+        if not self.real:
+            return imag
+        return '{}{}{}'.format(self.real, '+' if self.imag > 0 else '', imag)
+
+    def __eq__(self, other):
+        if isinstance(other, GaussianInt):
+            return self.real == other.real and self.imag == other.imag
+        if isinstance(other, (int, float, complex)):
+            return self.real == other.real and self.imag == other.imag
+        return NotImplemented
+
+    def __hash__(self):
+        # The hash of a complex number with the same parts, as they compare
+        # equal, computed like CPython does from the hashes of the parts.
+        if not self.imag:
+            return hash(self.real)
+        m = 2**sys.hash_info.width
+        h = (hash(self.real) + sys.hash_info.imag*hash(self.imag)) % m
+        if h >= m // 2:
+            h -= m
+        return -2 if h == -1 else h
+
+    def __bool__(self):
+        return bool(self.real or self.imag)
+
+    def __neg__(self):
+        return GaussianInt(-self.real, -self.imag)
+
+    def __add__(self, other):
+        other = GaussianInt._operand(other)
+        if other is None:
+            return NotImplemented
+        return GaussianInt(self.real + other.real, self.imag + other.imag)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        other = GaussianInt._operand(other)
+        if other is None:
+            return NotImplemented
+        return GaussianInt(self.real - other.real, self.imag - other.imag)
+
+    def __rsub__(self, other):
+        other = GaussianInt._operand(other)
+        if other is None:
+            return NotImplemented
+        return other - self
+
+    def __mul__(self, other):
+        other = GaussianInt._operand(other)
+        if other is None:
+            return NotImplemented
+        a, b, c, d = self.real, self.imag, other.real, other.imag
+        return GaussianInt(a*c - b*d, a*d + b*c)
+
+    __rmul__ = __mul__
+
+    def __pow__(self, k):
+        """
+            Raises z to an integer power k. A negative power is only a
+            Gaussian integer if z is a unit, i.e. 1, i, -1 or -i, whose
+            inverse is its conjugate, otherwise it raises a ValueError.
+        """
+        if not isinstance(k, int):
+            return NotImplemented
+        z = self
+        if k < 0:
+            if z.norm() != 1:
+                raise ValueError('{} is not a unit, so has no negative powers'.format(z))
+            z, k = z.conjugate(), -k
+        result = GaussianInt(1, 0)
+        while k:
+            if k % 2:
+                result *= z
+            z *= z
+            k //= 2
+        return result
+
+    def __divmod__(self, other):
+        """
+            Division with remainder, where the quotient is the Gaussian
+            integer nearest to the exact quotient, so that the remainder has
+            at most half the norm of the divisor.
+        """
+        other = GaussianInt._operand(other)
+        if other is None:
+            return NotImplemented
+        m = other.norm()
+        if not m:
+            raise ZeroDivisionError('Gaussian integer division by zero')
+        z = self*other.conjugate()
+        q = GaussianInt((2*z.real + m) // (2*m), (2*z.imag + m) // (2*m))
+        return q, self - q*other
+
+    def __rdivmod__(self, other):
+        other = GaussianInt._operand(other)
+        if other is None:
+            return NotImplemented
+        return divmod(other, self)
+
+    def __floordiv__(self, other):
+        result = self.__divmod__(other)
+        return result if result is NotImplemented else result[0]
+
+    def __mod__(self, other):
+        result = self.__divmod__(other)
+        return result if result is NotImplemented else result[1]
+
+    def norm(self):
+        """
+            The norm N(a + bi) = a^2 + b^2.
+        """
+        return self.real*self.real + self.imag*self.imag
+
+    def conjugate(self):
+        return GaussianInt(self.real, -self.imag)
+
+    def rotate(self, k=1):
+        """
+            Multiplies by the unit i^k, i.e. rotates by k right angles.
+        """
+        a, b = self.real, self.imag
+        for _ in range(k % 4):
+            a, b = -b, a
+        return GaussianInt(a, b)
+
+    def associates(self):
+        """
+            Generates the four associates u x z of z for the units
+            u = 1, i, -1, -i.
+        """
+        for k in range(4):
+            yield self.rotate(k)
+
+    def normalised(self):
+        """
+            Returns the unique associate a + bi with a > 0 and b >= 0, or 0.
+        """
+        for z in self.associates():
+            if z.real > 0 and z.imag >= 0:
+                return z
+        return GaussianInt(0, 0)
+
+    def is_divisible_by(self, other):
+        """
+            Checks whether other divides self, without a division with
+            remainder: a + bi is divisible by c + di iff both parts of
+            (a + bi)(c - di) are divisible by c^2 + d^2.
+        """
+        other = GaussianInt.from_number(other)
+        a, b, c, d = self.real, self.imag, other.real, other.imag
+        m = c*c + d*d
+        if not m:
+            return not self
+        return (a*c + b*d) % m == 0 and (b*c - a*d) % m == 0
+
+
+def gaussian_gcd(z, w):
+    """
+        Returns a greatest common divisor of two Gaussian integers by the
+        Euclidean algorithm, normalised to the associate a + bi with a > 0
+        and b >= 0 (or 0 if both are 0).
+    """
+    z, w = GaussianInt.from_number(z), GaussianInt.from_number(w)
+    while w:
+        z, w = w, z % w
+    return z.normalised()